@@ -5,6 +5,8 @@ import logging
 import os
 import json
 
+MAX_PARAMETER_LENGTH = 4096 # AWS limit for the length of a standard Parameter Store value
+
 class ConfigHelper:
     
     @staticmethod
@@ -57,7 +59,7 @@ class ConfigHelperFile(ConfigHelper):
         self.set(key, json.dumps(value), is_secret)
 
     def set(self, key, value, is_secret=False):
-        if len(value) > 4096:
+        if len(value) > MAX_PARAMETER_LENGTH:
             raise configparser.ValueError(message=f'Length of value exceeds AWS limit of 4kB. Value: "{value}"')
 
         try:
@@ -149,7 +151,7 @@ class ConfigHelperParameterStore(ConfigHelper):
 
         full_path = self._get_full_path(key)
 
-        if len(value) > 4096:
+        if len(value) > MAX_PARAMETER_LENGTH:
             raise configparser.ValueError(message=f'Length of value exceeds AWS limit of 4kB. Value: "{value}"')
 
         self._set_in_parameter_store(full_path, value, is_secret)
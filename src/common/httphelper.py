@@ -0,0 +1,160 @@
+import logging
+import zlib
+import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None # urllib3 won't ask for br responses without it, so we won't need to decode them
+
+class HttpHelper:
+
+    '''
+    Wraps a pooled, keep-alive HTTP client that negotiates compressed responses and keeps track of how many bytes
+    we transfer and how many connections we open.
+
+    Create this once per script rather than once per request, so that warm Lambda invocations can reuse the
+    connections left open by previous invocations.
+    '''
+
+    @staticmethod
+    def get_http_helper(num_retries, retry_backoff_factor, request_timeout_seconds, use_http2):
+        if use_http2:
+            logging.info("Using HTTP/2 transport")
+
+            return HttpHelperHttpx(num_retries=num_retries, request_timeout_seconds=request_timeout_seconds)
+
+        else:
+            logging.info("Using HTTP/1.1 transport")
+
+            return HttpHelperRequests(num_retries=num_retries, retry_backoff_factor=retry_backoff_factor, request_timeout_seconds=request_timeout_seconds)
+
+    # The longest a single call to get() can take if every attempt times out, which is roughly how urllib3 backs off between retries
+    @staticmethod
+    def get_max_request_seconds(num_retries, retry_backoff_factor, request_timeout_seconds):
+        total_backoff_seconds = sum(retry_backoff_factor * (2 ** (attempt - 1)) for attempt in range(2, num_retries + 1))
+
+        return request_timeout_seconds * (num_retries + 1) + total_backoff_seconds
+
+    def reset_stats(self):
+        self.num_requests           = 0
+        self.num_connections_opened = 0
+        self.bytes_on_wire          = 0
+        self.bytes_decoded          = 0
+
+    def get_stats(self):
+        return {
+            'num_requests':           self.num_requests,
+            'num_connections_opened': self.num_connections_opened,
+            'num_connections_reused': max(self.num_requests - self.num_connections_opened, 0),
+            'bytes_on_wire':          self.bytes_on_wire,
+            'bytes_decoded':          self.bytes_decoded,
+        }
+
+class HttpHelperRequests(HttpHelper):
+
+    '''
+    Uses a requests Session with a pooled urllib3 adapter, asking for gzip, deflate, and (if the brotli package is installed) br responses.
+
+    We read the body ourselves without decoding it so that we can count the bytes on the wire: urllib3 doesn't count them for chunked responses.
+    '''
+
+    def __init__(self, num_retries, retry_backoff_factor, request_timeout_seconds):
+        self.request_timeout_seconds = request_timeout_seconds
+
+        retries = Retry(total=num_retries, backoff_factor=retry_backoff_factor)
+
+        self.adapter = HTTPAdapter(max_retries=retries)
+
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update(make_headers(accept_encoding=True)) # Only asks for br if we're able to decode it
+
+        self.reset_stats()
+
+    def get(self, url):
+        num_connections_before = self._get_num_connections_opened()
+
+        response = self.session.get(url, timeout=self.request_timeout_seconds, stream=True) # requests has no timeout by default, so a stuck request could run past the Lambda deadline
+
+        encoded_content = b"".join(response.raw.stream(decode_content=False))
+        response.raw.release_conn() # Hand the connection back to the pool so that it can be reused
+
+        content = HttpHelperRequests._decode_content(encoded_content, response.headers.get("Content-Encoding", ""))
+
+        self.num_requests           += 1
+        self.num_connections_opened += self._get_num_connections_opened() - num_connections_before
+        self.bytes_on_wire          += len(encoded_content)
+        self.bytes_decoded          += len(content)
+
+        return HttpResponse(status_code=response.status_code, text=content.decode(response.encoding or "utf-8", errors="replace"))
+
+    @staticmethod
+    def _decode_content(content, content_encoding):
+        # Encodings are listed in the order they were applied, so undo them in reverse
+        for encoding in reversed([e.strip().lower() for e in content_encoding.split(",") if e.strip()]):
+            if encoding == "gzip":
+                content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+            elif encoding == "deflate":
+                try:
+                    content = zlib.decompress(content)
+                except zlib.error:
+                    content = zlib.decompress(content, -zlib.MAX_WBITS) # Some servers send raw deflate data without the zlib header
+            elif encoding == "br":
+                content = brotli.decompress(content)
+            elif encoding != "identity":
+                raise ValueError(f"Unsupported Content-Encoding '{content_encoding}'")
+
+        return content
+
+    def _get_num_connections_opened(self):
+        # Each pool keeps a running count of the new connections it has had to open
+        pools = self.adapter.poolmanager.pools
+
+        return sum(pools[key].num_connections for key in pools.keys())
+
+class HttpHelperHttpx(HttpHelper):
+
+    '''
+    Uses an httpx Client, which can negotiate HTTP/2 and multiplex our requests over a single connection.
+    Needs the httpx[http2] package, and the brotli package to decode br responses.
+
+    Note that httpx only retries failed connections, and does not back off between attempts.
+    '''
+
+    def __init__(self, num_retries, request_timeout_seconds):
+        transport = httpx.HTTPTransport(http2=True, retries=num_retries)
+
+        self.client = httpx.Client(transport=transport, timeout=request_timeout_seconds) # Otherwise httpx defaults to 5 seconds, which is too short for our larger batches
+
+        self.reset_stats()
+
+    def get(self, url):
+        connections_opened = []
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                connections_opened.append(event_name)
+
+        response = self.client.get(url, extensions={"trace": trace})
+
+        self.num_requests           += 1
+        self.num_connections_opened += len(connections_opened)
+        self.bytes_on_wire          += response.num_bytes_downloaded # Counts the bytes read from the socket, before they were decompressed
+        self.bytes_decoded          += len(response.content)
+
+        return HttpResponse(status_code=response.status_code, text=response.text)
+
+class HttpResponse:
+
+    '''
+    The parts of a response that we care about, regardless of which client fetched it
+    '''
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text        = text
@@ -0,0 +1,21 @@
+import boto3
+from botocore.exceptions import ClientError
+import logging
+
+class LambdaHelper:
+
+    '''
+    Wraps the functionality of invoking a Lambda function
+    '''
+
+    def __init__(self, region):
+        self.lambda_client = boto3.client('lambda', region_name=region)
+
+    # Returns immediately: the function is queued to run asynchronously, and any retries are handled by Lambda
+    def invoke_async(self, function_name):
+        try:
+            response = self.lambda_client.invoke(FunctionName=function_name, InvocationType='Event')
+            logging.info(f"Successfully queued invocation of '{function_name}' with status code {response['StatusCode']}")
+        except ClientError:
+            logging.exception(f"Could not invoke '{function_name}'")
+            raise
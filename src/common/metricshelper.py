@@ -15,6 +15,9 @@ class MetricsHelper:
     def send_time(self, metric_name, time_in_seconds):
         self._send_metric(metric_name, time_in_seconds, "Seconds")
 
+    def send_bytes(self, metric_name, num_bytes):
+        self._send_metric(metric_name, num_bytes, "Bytes")
+
     def send_count(self, metric_name, count):
         self._send_metric(metric_name, count, "Count")
 
@@ -3,20 +3,19 @@
 import sys
 sys.path.insert(0, './common')
 
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-
 import logging
 import sys
 import json
 from datetime import date
 from itertools import takewhile
 
-from highfiveparser import HighFiveParser
-from confighelper import ConfigHelper
+from highfiveparser import HighFiveParser, parse_date
+from highfivecrawler import HighFiveCrawler
+from confighelper import ConfigHelper, MAX_PARAMETER_LENGTH
 from metricshelper import MetricsHelper
 from emailhelper import EmailHelper
+from lambdahelper import LambdaHelper
+from httphelper import HttpHelper
 
 #
 # Setup logging
@@ -43,6 +42,8 @@ BASE_URL                = config_helper.get("base-url")
 BATCH_SIZE              = config_helper.getInt("batch-size")
 NUM_RETRIES             = config_helper.getInt("num-retries")
 RETRY_BACKOFF_FACTOR    = config_helper.getFloat("retry-backoff-factor")
+REQUEST_TIMEOUT_SECONDS = config_helper.getFloat("request-timeout-seconds")
+USE_HTTP2               = config_helper.getBool("use-http2")
 
 NAMES_OF_INTEREST       = config_helper.getArray("names-of-interest")
 COMMUNITIES_OF_INTEREST = config_helper.getArray("communities-of-interest")
@@ -54,6 +55,9 @@ SEND_METRICS            = config_helper.getBool("send-metrics")
 
 SET_PREVIOUSLY_SENT_HIGH_FIVE_IDS = config_helper.getBool("set-previously-sent-high-five-ids")
 
+CHECKPOINT_MARGIN_SECONDS  = config_helper.getInt("checkpoint-margin-seconds")
+CHECKPOINT_MAX_AGE_SECONDS = config_helper.getInt("checkpoint-max-age-seconds")
+
 SEND_EMAIL              = config_helper.getBool("send-email")
 SUBJECT_LINE_SINGULAR   = config_helper.get("subject-line-singular")
 SUBJECT_LINE_PLURAL     = config_helper.get("subject-line-plural")
@@ -61,6 +65,12 @@ TO_EMAIL_ADDRESS        = config_helper.get("to-email")
 CC_EMAIL_ADDRESS        = config_helper.get("cc-email")
 FROM_EMAIL_ADDRESS      = config_helper.get("from-email")
 
+# We only check how much time we have left before getting each batch, so we need to leave enough time to get one even if every attempt times out
+MAX_REQUEST_SECONDS = HttpHelper.get_max_request_seconds(num_retries=NUM_RETRIES, retry_backoff_factor=RETRY_BACKOFF_FACTOR, request_timeout_seconds=REQUEST_TIMEOUT_SECONDS)
+
+if CHECKPOINT_MARGIN_SECONDS < MAX_REQUEST_SECONDS:
+  raise ValueError(f"checkpoint-margin-seconds ({CHECKPOINT_MARGIN_SECONDS}) must be at least {MAX_REQUEST_SECONDS} seconds, which is how long getting a single batch can take with request-timeout-seconds of {REQUEST_TIMEOUT_SECONDS} and num-retries of {NUM_RETRIES}")
+
 NAMES_OF_INTEREST_LOWERCASE = [s.lower() for s in NAMES_OF_INTEREST]
 COMMUNITIES_OF_INTEREST_LOWERCASE = [s.lower() for s in COMMUNITIES_OF_INTEREST]
 
@@ -69,8 +79,12 @@ COMMUNITIES_OF_INTEREST_LOWERCASE = [s.lower() for s in COMMUNITIES_OF_INTEREST]
 #
 
 email_helper   = EmailHelper(region=AWS_REGION)
+lambda_helper  = LambdaHelper(region=AWS_REGION)
 metrics_helper = MetricsHelper(environment=config_helper.get_environment(), region=AWS_REGION, metrics_namespace=METRICS_NAMESPACE)
 
+# Created once here rather than per invocation, so that warm Lambda invocations can reuse its open connections
+http_helper    = HttpHelper.get_http_helper(num_retries=NUM_RETRIES, retry_backoff_factor=RETRY_BACKOFF_FACTOR, request_timeout_seconds=REQUEST_TIMEOUT_SECONDS, use_http2=USE_HTTP2)
+
 #
 # Helper functions
 #
@@ -99,54 +113,23 @@ def high_five_has_name_of_interest(high_five):
 
   return False
 
-def get_all_high_fives():
-  retries = Retry(total=NUM_RETRIES, backoff_factor=RETRY_BACKOFF_FACTOR)
-  adapter = HTTPAdapter(max_retries=retries)
-
-  session = requests.Session()
-  session.mount("https://", adapter)
-
-  # The pagination of this endpoint is a bit strange
-  #
-  # We can't just keep going until we get no results, because there is a point near the end of the results where we can get an
-  # empty response, but if we keep going we will eventially find more.
-  #
-  # There's a Count value in the object returned, and it seems to fluctuate between 2 or more values as we page through the
-  # results. My guess is that it's fluctuating between the actual number of real records, and the largest ID of a record -- since there's the gap mentioned above.
-  #
-  # So, we're going to keep track of the largest count that we see, and keep asking for results until we hit it
-
-  current_offset = 0
-  total_high_fives = 0
-
-  all_high_fives = []
-
-  while True:
-    # p is the count
-    # e is the offset
-    url = BASE_URL + f"&p={BATCH_SIZE}&e={current_offset}"
-
-    response = session.get(url)
-
-    if response.status_code != 200:
-      logger.error(f"Received status code {response.status_code} after {NUM_RETRIES} attempts from URL '{url}'")
-      graceful_exit(-1)
-
-    response_data = json.loads(response.text)
-
-    total_high_fives = max(total_high_fives, response_data['Count'])
+def fetch_high_fives_batch(offset):
+  # p is the count
+  # e is the offset
+  url = BASE_URL + f"&p={BATCH_SIZE}&e={offset}"
 
-    current_offset += BATCH_SIZE
+  response = http_helper.get(url)
 
-    high_fives_batch = list(map(HighFiveParser.parse_high_five, response_data['Results']))
-    high_fives_batch = list(filter(lambda high_five:high_five['message'] is not None, high_fives_batch))
+  if response.status_code != 200:
+    logger.error(f"Received status code {response.status_code} after {NUM_RETRIES} attempts from URL '{url}'")
+    graceful_exit(-1)
 
-    all_high_fives += high_fives_batch
+  response_data = json.loads(response.text)
 
-    if current_offset >= total_high_fives:
-      break
+  high_fives_batch = list(map(HighFiveParser.parse_high_five, response_data['Results']))
+  high_fives_batch = list(filter(lambda high_five:high_five['message'] is not None, high_fives_batch))
 
-  return all_high_fives
+  return response_data['Count'], high_fives_batch
 
 def email_high_fives(high_fives):
   body_text = "\n\n".join(map(HighFiveParser.stringify_high_five, high_fives))
@@ -158,10 +141,10 @@ def email_high_fives(high_fives):
 
   email_helper.send_email(FROM_EMAIL_ADDRESS, TO_EMAIL_ADDRESS, CC_EMAIL_ADDRESS, subject_line, body_text)
 
-def calculate_metrics(all_high_fives, interesting_high_fives):
+def calculate_metrics(run_state):
   logger.info("*** Metrics information ***")
-  num_high_fives_found = len(all_high_fives)
-  num_interesting_high_fives_found = len(interesting_high_fives)
+  num_high_fives_found = run_state['num_high_fives_found']
+  num_interesting_high_fives_found = len(run_state['interesting_high_five_ids'])
 
   logger.info(f"Found {num_high_fives_found} total High Fives")
   logger.info(f"Found {num_interesting_high_fives_found} interesting High Fives")
@@ -174,17 +157,28 @@ def calculate_metrics(all_high_fives, interesting_high_fives):
     logger.info("No high fives found, so no further telemetry can be sent")
     return
 
-  most_recent_high_five = all_high_fives[0]
-
-  if most_recent_high_five['date'] is None:
-    logger.info(f"No date found in High Five {most_recent_high_five['id']} so can't send telemetry about its age")
+  if run_state['most_recent_high_five_date'] is None:
+    logger.info(f"No date found in High Five {run_state['most_recent_high_five_id']} so can't send telemetry about its age")
   else:
-    most_recent_high_five_age_days = (date.today() - most_recent_high_five['date']).days
+    most_recent_high_five_age_days = (date.today() - parse_date(run_state['most_recent_high_five_date'])).days
     logger.info(f"Most recent High Five found is {most_recent_high_five_age_days} days old")
 
   if SEND_METRICS:
     metrics_helper.send_count("most-recent-high-five-age-days", most_recent_high_five_age_days)
 
+def calculate_transport_metrics(run_state):
+  logger.info("*** Transport information ***")
+  stats = run_state['transport_stats']
+
+  logger.info(f"Made {stats['num_requests']} requests, opening {stats['num_connections_opened']} new connections and reusing {stats['num_connections_reused']}")
+  logger.info(f"Downloaded {stats['bytes_on_wire']} bytes on the wire, which decoded to {stats['bytes_decoded']} bytes")
+
+  if SEND_METRICS:
+    metrics_helper.send_bytes("bytes-on-wire", stats['bytes_on_wire'])
+    metrics_helper.send_bytes("bytes-decoded", stats['bytes_decoded'])
+    metrics_helper.send_count("connections-opened", stats['num_connections_opened'])
+    metrics_helper.send_count("connections-reused", stats['num_connections_reused'])
+
 def log_high_five(high_five):
   high_five_components = HighFiveParser.stringify_high_five_components(high_five)
 
@@ -196,17 +190,28 @@ def get_new_high_fives_and_send_email(event, context):
   # Need to do this at the start of every request, since Lambda doesn't necessarily re-run the entire script for each invocation
   PREVIOUSLY_SENT_HIGH_FIVE_IDS = config_helper.getArray("previously-sent-high-five-ids")
 
+  # Our HTTP client lives across invocations, so only count what this invocation transferred
+  http_helper.reset_stats()
+
+  # A large crawl may take more than one invocation, so pick up wherever the last one got to
+
+  run_state = crawler.load_checkpoint()
+
   # Request all of the high fives and filter out the ones that contain our person and community of interest
 
-  all_high_fives = get_all_high_fives()
+  finished = crawler.get_high_fives(run_state, PREVIOUSLY_SENT_HIGH_FIVE_IDS, context)
 
-  logger.info(f"Found {len(all_high_fives)} high fives")
+  if not finished:
+    # Save our progress and get another invocation to carry on from there. Nothing gets emailed or marked as sent until the run is complete
+    crawler.save_checkpoint(run_state)
+    lambda_helper.invoke_async(context.invoked_function_arn)
+    return
 
-  interesting_high_fives = list(filter(high_five_has_name_of_interest, all_high_fives))
+  logger.info(f"Found {run_state['num_high_fives_found']} high fives")
 
-  logger.info(f"Found {len(interesting_high_fives)} interesting high fives")
+  logger.info(f"Found {len(run_state['interesting_high_five_ids'])} interesting high fives")
 
-  interesting_unsent_high_fives = list(filter(lambda high_five: not (high_five['id'] in PREVIOUSLY_SENT_HIGH_FIVE_IDS), interesting_high_fives))
+  interesting_unsent_high_fives = run_state['interesting_unsent_high_fives']
 
   logger.info(f"Found {len(interesting_unsent_high_fives)} unsent interesting high fives")
   for high_five in interesting_unsent_high_fives:
@@ -219,12 +224,29 @@ def get_new_high_fives_and_send_email(event, context):
     else:
       logger.info("No unsent interesting high fives found, so not sending email")
 
-  calculate_metrics(all_high_fives, interesting_high_fives)
+  calculate_metrics(run_state)
+  calculate_transport_metrics(run_state)
 
   # Be sure to do this last, so that if we have an error earlier (e.g. sending the email) then we won't miss sending out a High Five in a subsequent run
-  if SET_PREVIOUSLY_SENT_HIGH_FIVE_IDS and (len(all_high_fives) > 0):
-    interesting_high_five_ids = list(map(lambda high_five:high_five['id'], interesting_high_fives))
-    config_helper.setArray("previously-sent-high-five-ids", interesting_high_five_ids)
+  if SET_PREVIOUSLY_SENT_HIGH_FIVE_IDS and (run_state['num_high_fives_found'] > 0):
+    config_helper.setArray("previously-sent-high-five-ids", run_state['interesting_high_five_ids'])
+
+  # The next run needs to start again from the beginning
+  crawler.clear_checkpoint()
+
+#
+# Init our crawler, now that the functions it uses are defined
+#
+
+crawler = HighFiveCrawler(
+  fetch_batch=fetch_high_fives_batch,
+  get_transport_stats=http_helper.get_stats,
+  has_name_of_interest=high_five_has_name_of_interest,
+  config_helper=config_helper,
+  batch_size=BATCH_SIZE,
+  checkpoint_margin_seconds=CHECKPOINT_MARGIN_SECONDS,
+  checkpoint_max_age_seconds=CHECKPOINT_MAX_AGE_SECONDS,
+  max_checkpoint_length=MAX_PARAMETER_LENGTH)
 
 if RUN_AT_SCRIPT_STARTUP:
   get_new_high_fives_and_send_email(None, None)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import json
+import logging
+import time
+
+from highfiveparser import HighFiveParser
+
+TRANSPORT_STAT_NAMES = ['num_requests', 'num_connections_opened', 'num_connections_reused', 'bytes_on_wire', 'bytes_decoded']
+
+class HighFiveCrawler:
+
+  '''
+  Pages through all of the High Fives, keeping only what we need once the run is complete so that a run which is about to time out
+  can be checkpointed and then resumed by a later invocation
+  '''
+
+  def __init__(self, fetch_batch, get_transport_stats, has_name_of_interest, config_helper, batch_size, checkpoint_margin_seconds, checkpoint_max_age_seconds, max_checkpoint_length):
+    self.fetch_batch                = fetch_batch # Takes an offset, and returns the Count reported by the endpoint along with a list of parsed High Fives
+    self.get_transport_stats        = get_transport_stats # Returns what has been transferred so far in this invocation
+    self.has_name_of_interest       = has_name_of_interest
+    self.config_helper              = config_helper
+    self.batch_size                 = batch_size
+    self.checkpoint_margin_seconds  = checkpoint_margin_seconds
+    self.checkpoint_max_age_seconds = checkpoint_max_age_seconds
+    self.max_checkpoint_length      = max_checkpoint_length
+
+  @staticmethod
+  def get_empty_run_state():
+    return {
+      'current_offset': 0,
+      'total_high_fives': 0,
+      'num_high_fives_found': 0,
+      'last_high_five_id': None,
+      'most_recent_high_five_id': None,
+      'most_recent_high_five_date': None,
+      'interesting_high_five_ids': [],
+      'interesting_unsent_high_fives': [],
+      'transport_stats': {name: 0 for name in TRANSPORT_STAT_NAMES}
+    }
+
+  def load_checkpoint(self):
+    checkpoint = json.loads(self.config_helper.get("checkpoint"))
+
+    if len(checkpoint) == 0:
+      logging.info("No checkpoint found, so starting a new run")
+      return HighFiveCrawler.get_empty_run_state()
+
+    # If we couldn't resume straight away then the checkpoint will be left behind until our next scheduled run. By then new High Fives
+    # will have been added at the start of the results, which we've already gone past, so we need to start again from the beginning.
+    # This is how long ago the checkpoint was saved rather than when the run started, so that a run can take as many invocations as it needs
+    checkpoint_age_seconds = time.time() - checkpoint.pop('saved_at')
+
+    if checkpoint_age_seconds > self.checkpoint_max_age_seconds:
+      logging.warning(f"Discarding checkpoint at offset {checkpoint['current_offset']} because it is {checkpoint_age_seconds:.0f} seconds old, and starting a new run")
+      return HighFiveCrawler.get_empty_run_state()
+
+    logging.info(f"Resuming run from checkpoint at offset {checkpoint['current_offset']}")
+
+    checkpoint['interesting_unsent_high_fives'] = list(map(HighFiveParser.deserialize_high_five, checkpoint['interesting_unsent_high_fives']))
+
+    return checkpoint
+
+  @staticmethod
+  def get_checkpoint(run_state):
+    checkpoint = {**run_state, 'saved_at': time.time(), 'interesting_unsent_high_fives': list(map(HighFiveParser.serialize_high_five, run_state['interesting_unsent_high_fives']))}
+
+    return json.dumps(checkpoint)
+
+  def save_checkpoint(self, run_state):
+    self.config_helper.set("checkpoint", HighFiveCrawler.get_checkpoint(run_state))
+
+  def clear_checkpoint(self):
+    self.config_helper.set("checkpoint", json.dumps({}))
+
+  def checkpoint_fits(self, run_state):
+    # The checkpoint lives in the Parameter Store alongside our config, so it has the same size limit. We normally only hold on to a
+    # handful of unsent High Fives, but if there are too many to fit we'll just have to keep going and hope we finish in time
+    return len(HighFiveCrawler.get_checkpoint(run_state)) <= self.max_checkpoint_length
+
+  def is_near_deadline(self, context):
+    # We don't get a context when running locally, and so have no deadline
+    if context is None:
+      return False
+
+    return context.get_remaining_time_in_millis() < self.checkpoint_margin_seconds * 1000
+
+  def get_high_fives(self, run_state, previously_sent_high_five_ids, context):
+    # The pagination of this endpoint is a bit strange
+    #
+    # We can't just keep going until we get no results, because there is a point near the end of the results where we can get an
+    # empty response, but if we keep going we will eventially find more.
+    #
+    # There's a Count value in the object returned, and it seems to fluctuate between 2 or more values as we page through the
+    # results. My guess is that it's fluctuating between the actual number of real records, and the largest ID of a record -- since there's the gap mentioned above.
+    #
+    # So, we're going to keep track of the largest count that we see, and keep asking for results until we hit it
+    #
+    # Returns whether we got through all of the High Fives: if not, run_state contains where we got to
+
+    fetched_batch = False
+
+    previous_transport_stats = dict(run_state['transport_stats'])
+
+    while True:
+      # Always get at least one batch per invocation, so that every invocation makes some progress
+      if fetched_batch and self.is_near_deadline(context):
+        self.update_transport_stats(run_state, previous_transport_stats) # So that we check the size of exactly what we'd save
+
+        if self.checkpoint_fits(run_state):
+          logging.info(f"Running out of time at offset {run_state['current_offset']} of {run_state['total_high_fives']}")
+          return False
+
+        logging.warning(f"Running out of time at offset {run_state['current_offset']} of {run_state['total_high_fives']}, but checkpoint is too large to save")
+
+      count, high_fives_batch = self.fetch_batch(run_state['current_offset'])
+
+      run_state['total_high_fives'] = max(run_state['total_high_fives'], count)
+
+      run_state['current_offset'] += self.batch_size
+
+      self.process_high_fives_batch(run_state, high_fives_batch, previously_sent_high_five_ids)
+
+      fetched_batch = True
+
+      if run_state['current_offset'] >= run_state['total_high_fives']:
+        self.update_transport_stats(run_state, previous_transport_stats)
+        return True
+
+  def process_high_fives_batch(self, run_state, high_fives_batch, previously_sent_high_five_ids):
+    # New High Fives may have been added since the previous batch (e.g. between invocations), pushing ones we've already seen into this batch.
+    # Skip past the last one we saw so that they aren't counted twice. If more than a whole batch's worth was added, or some were removed,
+    # then we can't tell and our count will be approximate
+    batch_ids = [high_five['id'] for high_five in high_fives_batch]
+
+    if run_state['last_high_five_id'] in batch_ids:
+      num_already_seen = batch_ids.index(run_state['last_high_five_id']) + 1
+      logging.info(f"Skipping {num_already_seen} High Fives at offset {run_state['current_offset'] - self.batch_size} that we've already seen")
+      high_fives_batch = high_fives_batch[num_already_seen:]
+
+    if len(high_fives_batch) == 0:
+      return
+
+    if run_state['num_high_fives_found'] == 0:
+      most_recent_high_five = high_fives_batch[0]
+      run_state['most_recent_high_five_id'] = most_recent_high_five['id']
+      run_state['most_recent_high_five_date'] = HighFiveParser.stringify_date(most_recent_high_five['date']) if most_recent_high_five['date'] is not None else None
+
+    run_state['num_high_fives_found'] += len(high_fives_batch)
+    run_state['last_high_five_id'] = high_fives_batch[-1]['id']
+
+    for high_five in filter(self.has_name_of_interest, high_fives_batch):
+      if high_five['id'] in run_state['interesting_high_five_ids']:
+        continue
+
+      run_state['interesting_high_five_ids'].append(high_five['id'])
+
+      if not (high_five['id'] in previously_sent_high_five_ids):
+        run_state['interesting_unsent_high_fives'].append(high_five)
+
+  # Our HTTP client lives across invocations and reports what this one has transferred, so add that on to what previous invocations transferred
+  def update_transport_stats(self, run_state, previous_transport_stats):
+    transport_stats = self.get_transport_stats()
+
+    run_state['transport_stats'] = {name: previous_transport_stats[name] + transport_stats[name] for name in TRANSPORT_STAT_NAMES}
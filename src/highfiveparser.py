@@ -70,3 +70,12 @@ class HighFiveParser:
   @staticmethod
   def stringify_date(date):
     return date.strftime('%b %-d, %Y')
+
+  # Converts a parsed High Five into something that can be written out as JSON, and back again
+  @staticmethod
+  def serialize_high_five(high_five):
+    return {**high_five, 'date': HighFiveParser.stringify_date(high_five['date']) if high_five['date'] is not None else None}
+
+  @staticmethod
+  def deserialize_high_five(serialized_high_five):
+    return {**serialized_high_five, 'date': parse_date(serialized_high_five['date'])}
@@ -11,6 +11,8 @@ module "lambda" {
   #cron_expression         = "cron(*/5 * * * ? *)"  # Run every 5 minutes for testing
   
   set_previously_sent_high_five_ids = true
+  checkpoint_margin_seconds         = 45 # Must cover one batch where every attempt times out: 10s x (3 retries + 1) plus backoff
+  checkpoint_max_age_seconds        = 600 # A few lambda timeouts: enough to cover retries of the resuming invocation
 
   metrics_namespace       = var.application_name
   send_metrics            = true
@@ -29,6 +31,8 @@ module "lambda" {
   batch_size              = 2000
   num_retries             = 3
   retry_backoff_factor    = 0.5
+  request_timeout_seconds = 10
+  use_http2               = false
 }
 
 module "alarms" {
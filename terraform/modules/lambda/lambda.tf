@@ -62,6 +62,17 @@ resource "aws_iam_role_policy" "iam_for_lambda_policy" {
       "Effect": "Allow",
       "Resource": "*"
     },
+    {
+      "Sid": "LambdaResumePolicy",
+      "Effect": "Allow",
+      "Action": [
+        "lambda:InvokeFunction"
+      ],
+      "Resource": [
+        "${aws_lambda_function.high_fives.arn}",
+        "${aws_lambda_function.high_fives.arn}:*"
+      ]
+    },
     {
       "Sid": "SQSDeadLetterAccessPolicy",
       "Effect": "Allow",
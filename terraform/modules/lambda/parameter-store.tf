@@ -26,6 +26,20 @@ resource "aws_ssm_parameter" "request_backoff_factor" {
   value       = var.retry_backoff_factor
 }
 
+resource "aws_ssm_parameter" "request_timeout_seconds" {
+  name        = "/${var.application_name}/${var.environment}/request-timeout-seconds"
+  description = "Number of seconds to wait for a response to a single request before giving up on it"
+  type        = "String"
+  value       = var.request_timeout_seconds
+}
+
+resource "aws_ssm_parameter" "use_http2" {
+  name        = "/${var.application_name}/${var.environment}/use-http2"
+  description = "Whether to request High Fives over HTTP/2 rather than HTTP/1.1"
+  type        = "String"
+  value       = var.use_http2
+}
+
 resource "aws_ssm_parameter" "names_of_interest" {
   name        = "/${var.application_name}/${var.environment}/names-of-interest"
   description = "JSON-formatted array of the names we're looking for in High Fives"
@@ -134,3 +148,32 @@ resource "aws_ssm_parameter" "previously_sent_high_five_ids" {
     ]
   }
 }
+
+resource "aws_ssm_parameter" "checkpoint_margin_seconds" {
+  name        = "/${var.application_name}/${var.environment}/checkpoint-margin-seconds"
+  description = "How many seconds before the lambda timeout to stop getting High Fives and save our progress"
+  type        = "String"
+  value       = var.checkpoint_margin_seconds
+}
+
+resource "aws_ssm_parameter" "checkpoint_max_age_seconds" {
+  name        = "/${var.application_name}/${var.environment}/checkpoint-max-age-seconds"
+  description = "How many seconds old a checkpoint can be before we discard it and start a new run from the beginning"
+  type        = "String"
+  value       = var.checkpoint_max_age_seconds
+}
+
+# We're going to use this as external storage, to persist how far we got through getting High Fives if we run out of time
+# So, ignore changes to the value of this parameter
+resource "aws_ssm_parameter" "checkpoint" {
+  name        = "/${var.application_name}/${var.environment}/checkpoint"
+  description = "JSON-formatted object containing our progress through a run that didn't finish within a single invocation"
+  type        = "String"
+  value       = "{}"
+
+  lifecycle {
+    ignore_changes = [
+      value,
+    ]
+  }
+}
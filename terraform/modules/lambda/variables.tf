@@ -10,6 +10,12 @@ variable "application_name" {
 variable "set_previously_sent_high_five_ids" {
 }
 
+variable "checkpoint_margin_seconds" {
+}
+
+variable "checkpoint_max_age_seconds" {
+}
+
 variable "send_metrics" {
 }
 
@@ -52,6 +58,12 @@ variable "num_retries" {
 variable "retry_backoff_factor" {
 }
 
+variable "request_timeout_seconds" {
+}
+
+variable "use_http2" {
+}
+
 variable "num_days_to_keep_images" {
 }
 
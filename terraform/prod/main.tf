@@ -10,6 +10,8 @@ module "lambda" {
   cron_expression         = "cron(0 16 * * ? *)"  # Run every day at 4:00 PM UTC = 9:00 AM PDT or 8:00 AM PST
 
   set_previously_sent_high_five_ids = true
+  checkpoint_margin_seconds         = 45 # Must cover one batch where every attempt times out: 10s x (3 retries + 1) plus backoff
+  checkpoint_max_age_seconds        = 600 # A few lambda timeouts: enough to cover retries of the resuming invocation
 
   metrics_namespace       = var.application_name
   send_metrics            = true
@@ -28,6 +30,8 @@ module "lambda" {
   batch_size              = 2000
   num_retries             = 3
   retry_backoff_factor    = 0.5
+  request_timeout_seconds = 10
+  use_http2               = false
 }
 
 module "alarms" {
@@ -0,0 +1,246 @@
+import sys
+sys.path.append("../src")
+
+import json
+import time
+from datetime import date
+
+from highfivecrawler import HighFiveCrawler
+
+class FakeConfigHelper:
+  def __init__(self, values):
+    self.values = values
+
+  def get(self, key, is_secret=False):
+    return self.values[key]
+
+  def set(self, key, value, is_secret=False):
+    self.values[key] = value
+
+class FakeContext:
+  def __init__(self, remaining_time_in_millis):
+    self.remaining_time_in_millis = remaining_time_in_millis
+
+  def get_remaining_time_in_millis(self):
+    return self.remaining_time_in_millis
+
+class FakeFetcher:
+  def __init__(self, count, batches):
+    self.count   = count
+    self.batches = batches
+    self.offsets = []
+
+  def __call__(self, offset):
+    self.offsets.append(offset)
+    return self.count, self.batches[len(self.offsets) - 1]
+
+def make_high_five(id, message="Thank you", high_five_date=date(2023, 9, 15)):
+  return {
+    'id': id,
+    'date': high_five_date,
+    'name': "Carol",
+    'communities': ["Maple Ridge"],
+    'message': message
+  }
+
+def has_name_of_interest(high_five):
+  return "Kate" in high_five['message']
+
+TRANSPORT_STATS = {'num_requests': 2, 'num_connections_opened': 1, 'num_connections_reused': 1, 'bytes_on_wire': 100, 'bytes_decoded': 400}
+
+def make_crawler(fetcher=None, checkpoint="{}", batch_size=2):
+  return HighFiveCrawler(
+    fetch_batch=fetcher,
+    get_transport_stats=lambda: TRANSPORT_STATS,
+    has_name_of_interest=has_name_of_interest,
+    config_helper=FakeConfigHelper({"checkpoint": checkpoint}),
+    batch_size=batch_size,
+    checkpoint_margin_seconds=20,
+    checkpoint_max_age_seconds=600,
+    max_checkpoint_length=4096)
+
+# Without a context (i.e. running locally) we should keep going until we reach the largest count we've seen
+def test_get_high_fives_no_context():
+  fetcher = FakeFetcher(count=5, batches=[
+    [make_high_five("1"), make_high_five("2", message="Thanks Kate")],
+    [make_high_five("3"), make_high_five("4")],
+    [make_high_five("5", message="Thanks Kate")]
+  ])
+  crawler = make_crawler(fetcher)
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  finished = crawler.get_high_fives(run_state, ["2"], None)
+
+  assert finished
+  assert fetcher.offsets == [0, 2, 4]
+  assert run_state['num_high_fives_found'] == 5
+  assert run_state['most_recent_high_five_id'] == "1"
+  assert run_state['most_recent_high_five_date'] == "Sep 15, 2023"
+  assert run_state['interesting_high_five_ids'] == ["2", "5"]
+  assert [high_five['id'] for high_five in run_state['interesting_unsent_high_fives']] == ["5"]
+
+# Even if we're already near the deadline we should get one batch, so that every invocation makes some progress, and then stop
+def test_get_high_fives_near_deadline():
+  fetcher = FakeFetcher(count=6, batches=[
+    [make_high_five("1"), make_high_five("2")],
+    [make_high_five("3"), make_high_five("4")]
+  ])
+  crawler = make_crawler(fetcher)
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  finished = crawler.get_high_fives(run_state, [], FakeContext(remaining_time_in_millis=10000))
+
+  assert not finished
+  assert fetcher.offsets == [0]
+  assert run_state['current_offset'] == 2
+  assert run_state['num_high_fives_found'] == 2
+
+# If there's plenty of time left then we shouldn't stop early
+def test_get_high_fives_not_near_deadline():
+  fetcher = FakeFetcher(count=4, batches=[
+    [make_high_five("1"), make_high_five("2")],
+    [make_high_five("3"), make_high_five("4")]
+  ])
+  crawler = make_crawler(fetcher)
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  finished = crawler.get_high_fives(run_state, [], FakeContext(remaining_time_in_millis=60000))
+
+  assert finished
+  assert fetcher.offsets == [0, 2]
+
+# If the checkpoint would be too large to save then we should keep going rather than stopping
+def test_get_high_fives_checkpoint_too_large():
+  long_message = "Thanks Kate " + ("x" * 5000)
+  fetcher = FakeFetcher(count=4, batches=[
+    [make_high_five("1", message=long_message), make_high_five("2")],
+    [make_high_five("3"), make_high_five("4")]
+  ])
+  crawler = make_crawler(fetcher)
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  finished = crawler.get_high_fives(run_state, [], FakeContext(remaining_time_in_millis=10000))
+
+  assert finished
+  assert fetcher.offsets == [0, 2]
+
+# If High Fives are added between invocations, ones we've already seen get pushed into the next batch and shouldn't be counted again
+def test_process_high_fives_batch_shifted_results():
+  crawler = make_crawler()
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  crawler.process_high_fives_batch(run_state, [make_high_five("1"), make_high_five("2", message="Thanks Kate")], [])
+
+  # Two new High Fives were added at the start, so the next batch begins with the last two we've already seen
+  crawler.process_high_fives_batch(run_state, [make_high_five("1"), make_high_five("2", message="Thanks Kate"), make_high_five("3")], [])
+
+  assert run_state['num_high_fives_found'] == 3
+  assert run_state['last_high_five_id'] == "3"
+  assert run_state['interesting_high_five_ids'] == ["2"]
+  assert [high_five['id'] for high_five in run_state['interesting_unsent_high_fives']] == ["2"]
+
+# An empty batch (which can happen part way through the results) shouldn't change anything
+def test_process_high_fives_batch_empty():
+  crawler = make_crawler()
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  crawler.process_high_fives_batch(run_state, [], [])
+
+  assert run_state['num_high_fives_found'] == 0
+  assert run_state['most_recent_high_five_id'] is None
+  assert run_state['last_high_five_id'] is None
+
+# A saved checkpoint should be loaded back in exactly as it was
+def test_checkpoint_round_trip():
+  crawler = make_crawler()
+  run_state = HighFiveCrawler.get_empty_run_state()
+
+  crawler.process_high_fives_batch(run_state, [make_high_five("1"), make_high_five("2", message="Thanks Kate")], [])
+  run_state['current_offset'] = 2
+  crawler.update_transport_stats(run_state, run_state['transport_stats'])
+
+  crawler.save_checkpoint(run_state)
+
+  assert crawler.load_checkpoint() == run_state
+
+# With no checkpoint we should start a new run from the beginning
+def test_load_checkpoint_empty():
+  crawler = make_crawler()
+
+  run_state = crawler.load_checkpoint()
+
+  assert run_state['current_offset'] == 0
+  assert run_state['num_high_fives_found'] == 0
+
+# A checkpoint that was left behind from a previous scheduled run should be discarded
+def test_load_checkpoint_stale():
+  run_state = HighFiveCrawler.get_empty_run_state()
+  run_state['current_offset'] = 2000
+
+  checkpoint = json.loads(HighFiveCrawler.get_checkpoint(run_state))
+  checkpoint['saved_at'] -= 86400
+
+  crawler = make_crawler(checkpoint=json.dumps(checkpoint))
+
+  assert crawler.load_checkpoint()['current_offset'] == 0
+
+# A run that takes many invocations should keep resuming, even once the whole run has taken longer than a checkpoint is allowed to be old
+def test_load_checkpoint_resumed_many_times(monkeypatch):
+  now = [time.time()]
+  monkeypatch.setattr(time, "time", lambda: now[0])
+
+  fetcher = FakeFetcher(count=8, batches=[
+    [make_high_five("1"), make_high_five("2")],
+    [make_high_five("3"), make_high_five("4")],
+    [make_high_five("5"), make_high_five("6")],
+    [make_high_five("7"), make_high_five("8", message="Thanks Kate")]
+  ])
+  crawler = make_crawler(fetcher)
+  context = FakeContext(remaining_time_in_millis=10000)
+
+  finished = False
+  num_invocations = 0
+
+  while not finished:
+    run_state = crawler.load_checkpoint()
+    finished = crawler.get_high_fives(run_state, [], context)
+    num_invocations += 1
+
+    if not finished:
+      crawler.save_checkpoint(run_state)
+      now[0] += 300 # Each invocation is well within the maximum age, but the whole run is not
+
+  assert num_invocations == 4
+  assert fetcher.offsets == [0, 2, 4, 6]
+  assert run_state['num_high_fives_found'] == 8
+  assert run_state['interesting_high_five_ids'] == ["8"]
+
+# Clearing the checkpoint should mean the next invocation starts from the beginning
+def test_clear_checkpoint():
+  run_state = HighFiveCrawler.get_empty_run_state()
+  run_state['current_offset'] = 2000
+
+  crawler = make_crawler(checkpoint=HighFiveCrawler.get_checkpoint(run_state))
+  crawler.clear_checkpoint()
+
+  assert json.loads(crawler.config_helper.get("checkpoint")) == {}
+  assert crawler.load_checkpoint()['current_offset'] == 0
+
+# Transport stats should be totalled up across invocations, and already be included in the checkpoint when we stop
+def test_transport_stats_across_invocations():
+  fetcher = FakeFetcher(count=4, batches=[
+    [make_high_five("1"), make_high_five("2")],
+    [make_high_five("3"), make_high_five("4")]
+  ])
+  crawler = make_crawler(fetcher)
+
+  run_state = crawler.load_checkpoint()
+  assert not crawler.get_high_fives(run_state, [], FakeContext(remaining_time_in_millis=10000))
+  crawler.save_checkpoint(run_state)
+
+  assert json.loads(crawler.config_helper.get("checkpoint"))['transport_stats'] == TRANSPORT_STATS
+
+  run_state = crawler.load_checkpoint()
+  assert crawler.get_high_fives(run_state, [], FakeContext(remaining_time_in_millis=10000))
+
+  assert run_state['transport_stats'] == {'num_requests': 4, 'num_connections_opened': 2, 'num_connections_reused': 2, 'bytes_on_wire': 200, 'bytes_decoded': 800}
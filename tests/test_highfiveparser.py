@@ -1,6 +1,8 @@
 import sys
 sys.path.append("../src")
 
+import json
+
 from highfiveparser import HighFiveParser
 
 # If a High Five contains no communities, then the resultant object should have an empty list
@@ -85,3 +87,39 @@ def test_two_communities():
   assert high_five_strings[1] == "From: Carol"
   assert high_five_strings[2] == "Communities: Maple Ridge and Fraser Health region"
   assert high_five_strings[3] == "Message: I received the highest quality of care during my stay in Ridge Meadows [Hospital]. Every nurse was cheerful, caring and invested in providing the best possible care. They regularly checked in on me and answered any questions I had. I feel fortunate to have been in the care of exceptionally dedicated, compassionate and kind nursing staff. Please convey my appreciation and thanks."
+
+# A High Five should be able to be written out as JSON and read back in without losing anything, so that it can be checkpointed
+def test_serialize_round_trip():
+  high_five_obj = {
+    "Id": "a00d07de-93b9-435a-a3f7-9139565aae0e",
+    "Language": "en",
+    "Path": "/sitecore/content/FraserHealth/FraserHealth/Home/highfive/2023/high-five-7",
+    "Url": "https://www.fraserhealth.ca/highfive/2023/high-five-7",
+    "Name": None,
+    "Html": "<div class=\"highfive-card\"><div class=\"card-message-wrapper\"><div class=\"highfive-community\"><span class=\"community-label\">For</span><span class=\"field-communityname\">Maple Ridge</span><span class=\"field-communityname\">Fraser Health region</span></div><div class=\"field-message\">I received the highest quality of care during my stay in Ridge Meadows [Hospital].</div><div class=\"field-highfivedate\">Aug 1, 2023</div><div class=\"field-firstname\">Carol</div></div></div>"
+  }
+
+  high_five = HighFiveParser.parse_high_five(high_five_obj)
+
+  serialized_high_five = json.loads(json.dumps(HighFiveParser.serialize_high_five(high_five)))
+
+  assert serialized_high_five['date'] == "Aug 1, 2023"
+  assert HighFiveParser.deserialize_high_five(serialized_high_five) == high_five
+
+# A High Five with no date should still be able to be written out as JSON and read back in
+def test_serialize_round_trip_no_date():
+  high_five_obj = {
+    "Id": "556f6b73-fb80-4562-854c-90c1bd4eaac0",
+    "Language": "en",
+    "Path": "/sitecore/content/FraserHealth/FraserHealth/Home/highfive/2023/high-five-8",
+    "Url": "https://www.fraserhealth.ca/highfive/2023/high-five-8",
+    "Name": None,
+    "Html": "<div class=\"highfive-card\"><div class=\"card-message-wrapper\"><div class=\"field-message\">Thank you to the staff for being kind.</div><div class=\"field-firstname\">Samantha Johnstone </div></div></div>"
+  }
+
+  high_five = HighFiveParser.parse_high_five(high_five_obj)
+
+  serialized_high_five = json.loads(json.dumps(HighFiveParser.serialize_high_five(high_five)))
+
+  assert serialized_high_five['date'] is None
+  assert HighFiveParser.deserialize_high_five(serialized_high_five) == high_five
@@ -0,0 +1,144 @@
+import sys
+sys.path.append("../src/common")
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import brotli
+import pytest
+
+from httphelper import HttpHelper, HttpHelperRequests, HttpHelperHttpx
+
+BODY = ('{"Count": 1, "Results": [' + ", ".join(['{"Html": "<div class=\\"field-message\\">Thank you</div>"}'] * 200) + ']}').encode("utf-8")
+
+GZIP_BODY   = gzip.compress(BODY)
+BROTLI_BODY = brotli.compress(BODY)
+
+class FakeHighFiveHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1" # So that connections are kept alive between requests
+
+  def do_GET(self):
+    if self.path == "/gzip":
+      self._send(GZIP_BODY, "gzip", chunked=False)
+    elif self.path == "/gzip-chunked":
+      self._send(GZIP_BODY, "gzip", chunked=True)
+    elif self.path == "/br-chunked":
+      self._send(BROTLI_BODY, "br", chunked=True)
+    else:
+      self._send(BODY, None, chunked=False)
+
+  def _send(self, content, content_encoding, chunked):
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json; charset=utf-8")
+
+    if content_encoding is not None:
+      self.send_header("Content-Encoding", content_encoding)
+
+    if chunked:
+      self.send_header("Transfer-Encoding", "chunked")
+      self.end_headers()
+
+      for i in range(0, len(content), 100):
+        chunk = content[i:i + 100]
+        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+
+      self.wfile.write(b"0\r\n\r\n")
+    else:
+      self.send_header("Content-Length", str(len(content)))
+      self.end_headers()
+      self.wfile.write(content)
+
+  def log_message(self, format, *args):
+    pass
+
+@pytest.fixture(scope="module")
+def base_url():
+  server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHighFiveHandler)
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+
+  yield f"http://127.0.0.1:{server.server_address[1]}"
+
+  server.shutdown()
+  server.server_close()
+
+@pytest.fixture(params=[False, True], ids=["requests", "httpx"])
+def http_helper(request):
+  return HttpHelper.get_http_helper(num_retries=0, retry_backoff_factor=0, request_timeout_seconds=5, use_http2=request.param)
+
+# We should get the right type of helper for the transport we ask for
+def test_get_http_helper():
+  assert isinstance(HttpHelper.get_http_helper(num_retries=0, retry_backoff_factor=0, request_timeout_seconds=5, use_http2=False), HttpHelperRequests)
+  assert isinstance(HttpHelper.get_http_helper(num_retries=0, retry_backoff_factor=0, request_timeout_seconds=5, use_http2=True), HttpHelperHttpx)
+
+# The first request should open a connection, and the second should reuse it
+def test_connection_reuse(base_url, http_helper):
+  http_helper.get(base_url + "/gzip")
+  http_helper.get(base_url + "/gzip")
+
+  stats = http_helper.get_stats()
+
+  assert stats['num_requests'] == 2
+  assert stats['num_connections_opened'] == 1
+  assert stats['num_connections_reused'] == 1
+
+# A compressed response with a Content-Length should count the compressed bytes on the wire
+def test_gzip_bytes(base_url, http_helper):
+  response = http_helper.get(base_url + "/gzip")
+
+  stats = http_helper.get_stats()
+
+  assert response.status_code == 200
+  assert response.text == BODY.decode("utf-8")
+  assert stats['bytes_on_wire'] == len(GZIP_BODY)
+  assert stats['bytes_decoded'] == len(BODY)
+
+# A compressed, chunked response should also count the compressed bytes on the wire (not including the chunk framing)
+def test_gzip_chunked_bytes(base_url, http_helper):
+  response = http_helper.get(base_url + "/gzip-chunked")
+
+  stats = http_helper.get_stats()
+
+  assert response.text == BODY.decode("utf-8")
+  assert stats['bytes_on_wire'] == len(GZIP_BODY)
+  assert stats['bytes_decoded'] == len(BODY)
+
+# Brotli responses should be decoded too
+def test_brotli_chunked_bytes(base_url, http_helper):
+  response = http_helper.get(base_url + "/br-chunked")
+
+  stats = http_helper.get_stats()
+
+  assert response.text == BODY.decode("utf-8")
+  assert stats['bytes_on_wire'] == len(BROTLI_BODY)
+  assert stats['bytes_decoded'] == len(BODY)
+
+# An uncompressed response should have the same number of bytes on the wire as decoded
+def test_uncompressed_bytes(base_url, http_helper):
+  http_helper.get(base_url + "/")
+
+  stats = http_helper.get_stats()
+
+  assert stats['bytes_on_wire'] == len(BODY)
+  assert stats['bytes_decoded'] == len(BODY)
+
+# Resetting the stats should only count what happens afterwards, but keep the connection open to be reused
+def test_reset_stats(base_url, http_helper):
+  http_helper.get(base_url + "/gzip")
+  http_helper.reset_stats()
+
+  assert http_helper.get_stats() == {'num_requests': 0, 'num_connections_opened': 0, 'num_connections_reused': 0, 'bytes_on_wire': 0, 'bytes_decoded': 0}
+
+  http_helper.get(base_url + "/gzip")
+
+  stats = http_helper.get_stats()
+
+  assert stats['num_requests'] == 1
+  assert stats['num_connections_opened'] == 0
+  assert stats['num_connections_reused'] == 1
+
+# The longest a request can take should include every attempt timing out, plus the backoff between them
+def test_get_max_request_seconds():
+  assert HttpHelper.get_max_request_seconds(num_retries=0, retry_backoff_factor=0.5, request_timeout_seconds=10) == 10
+  assert HttpHelper.get_max_request_seconds(num_retries=3, retry_backoff_factor=0.5, request_timeout_seconds=10) == 43